@@ -1,15 +1,39 @@
+import math
 import os
 import re
-import pandas
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# pandas and openpyxl are imported where they're used, so parsing prm files doesn't pay for loading them
 
-def _get_file_contents(path: Path):
-    return path.read_text()
+_SUBSECTION_RE = re.compile(r"subsection\s+(.+)")
+_SET_RE = re.compile(r"set\s+(.+?)\s*=\s*(.+?)(?:\s*,\s*(\S+))?$")
 
+# Header row of each (excel file, sheet) seen by add_to_excel, keyed to the file's mtime
+_excel_columns_cache = {}
 
-def _exists(path: Path):
-    return path.exists()
+
+def _maybe_read(path: Path):
+    # A single open instead of an exists() check followed by a read
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return ""
+
+
+# pandas dtypes for the prm type annotations that map onto a numeric spreadsheet column
+_PRM_DTYPES = {"DOUBLE": "float64", "INT": "int64"}
+
+
+def _flatten_parameters(section, prefix, params, field="value"):
+    # Subsections become dotted key prefixes so every parameter value lands in its own column
+    for name, entry in section.items():
+        if isinstance(entry.get("value"), str):
+            params[f"{prefix}{name}"] = entry[field]
+        else:
+            _flatten_parameters(entry, f"{prefix}{name}.", params, field)
 
 
 class ParameterFileParser:
@@ -18,40 +42,47 @@ class ParameterFileParser:
         self.section_stack = []
 
     def parse(self, prm_file):
+        # Read the whole file at once and keep the lookups used in the loop local
+        text = Path(prm_file).read_text()
         current_section = self.parameters
-        with open(prm_file, 'r') as f:
-            for line in f:
+        section_stack = self.section_stack
+        set_match = _SET_RE.match
+        subsection_match = _SUBSECTION_RE.match
 
-                line = line.strip()
+        for line in text.splitlines():
+            line = line.strip()
 
-                if not line:
-                    # skip empty files
-                    continue
+            if not line:
+                # skip empty files
+                continue
 
-                if line.startswith("#"):
-                    # skip comments
-                    continue
+            if line.startswith("#"):
+                # skip comments
+                continue
 
-                # Detect subsection
-                subsection_match = re.match(r"subsection\s+(.+)", line)
+            # Dispatch on the leading keyword so each line goes through at most one regex
+            if line.startswith("set"):
+                # Split `set <key> = <value>[, <type>]` with string operations; the key runs up to
+                # the first '='. With a single ',' the type is the single token after it, as in the
+                # regex. Values with several commas (lists, tensors) go to the regex, whose split
+                # point depends on the spacing around each comma
+                key, _, value = line[3:].partition("=")
+                if key[:1].isspace() and value.count(",") <= 1:
+                    key = key.strip()
+                    value = value.strip()
+                    value_type = None
+                    if "," in value:
+                        head, _, tail = value.partition(",")
+                        tail = tail.strip()
+                        if tail and len(tail.split()) == 1:
+                            value = head.rstrip()
+                            value_type = tail
+                    if key and value:
+                        current_section[key] = {"value": value, "type": value_type}
+                        continue
 
-                # Start of subsection
-                if subsection_match:
-                    subsection = subsection_match.group(1).strip()
-                    if subsection not in self.parameters:
-                        current_section[subsection] = {}
-                    self.section_stack.append(current_section)
-                    current_section = current_section[subsection]
-                    continue
-
-                # Detect the end of a subsection
-                if line == "end":
-                    if self.section_stack:
-                        current_section = self.section_stack.pop()
-                    continue
-
-                # Match set pattern for `set <key> = <value> [type]` and extract out key and value
-                key_value_match = re.match(r"set\s+(.+?)\s*=\s*(.+?)(?:\s*,\s*(\S+))?$", line)
+                # Fall back to the regex for lines the fast path doesn't split, e.g. an empty key
+                key_value_match = set_match(line)
                 if key_value_match:
                     key = key_value_match.group(1).strip()
                     value = key_value_match.group(2).strip()
@@ -60,34 +91,315 @@ class ParameterFileParser:
                     else:
                         value_type = None
                     current_section[key] = {"value": value, "type": value_type}
-                else:
-                    print(f"Warning: Unable to parse line: {line}")
+                    continue
 
-    def to_params(self, calculation, source_directory):
-        description_path = Path(source_directory) / "description.txt"
-        description = _get_file_contents(description_path) if _exists(description_path) else ""
+            # Start of subsection
+            elif line.startswith("subsection"):
+                match = subsection_match(line)
+                if match:
+                    subsection = match.group(1).strip()
+                    if subsection not in current_section:
+                        current_section[subsection] = {}
+                    section_stack.append(current_section)
+                    current_section = current_section[subsection]
+                    continue
 
-        observations_path = Path(source_directory) / "observations.txt"
-        observations = _get_file_contents(observations_path) if _exists(observations_path) else ""
+            # Detect the end of a subsection
+            elif line == "end":
+                if section_stack:
+                    current_section = section_stack.pop()
+                continue
 
-        description = Path(source_directory) / "description.txt"
-        return {
-            "c:Calculation": calculation,
+            print(f"Warning: Unable to parse line: {line}")
 
+    def to_params(self, calculation, source_directory):
+        description = _maybe_read(Path(source_directory) / "description.txt")
+        observations = _maybe_read(Path(source_directory) / "observations.txt")
+
+        params = {
+            "c:Calculation": calculation,
+            "c:Description": description,
+            "c:Observations": observations,
         }
+        parameters = {}
+        _flatten_parameters(self.parameters, "c:", parameters)
 
+        # Don't let a prm parameter silently replace the calculation name or sidecar text
+        collisions = params.keys() & parameters.keys()
+        if collisions:
+            raise Exception(f"Parameter names clash with calculation fields: {', '.join(sorted(collisions))}")
+
+        params.update(parameters)
+        return params
+
+    def to_dtypes(self):
+        """
+        Return the pandas dtype for each to_params column whose prm type annotation is numeric,
+        e.g. {"c:Model constant A": "float64"} for `set Model constant A = 2.0, DOUBLE`.
+        """
+        types = {}
+        _flatten_parameters(self.parameters, "c:", types, field="type")
+        return {column: _PRM_DTYPES[value_type.upper()] for column, value_type in types.items()
+                if value_type and value_type.upper() in _PRM_DTYPES}
+
+
+def _calculation_params(calculation, source_directory, prm_file_name):
+    parser = ParameterFileParser()
+    parser.parse(Path(source_directory) / prm_file_name)
+    return parser.to_params(calculation, source_directory)
+
+
+def collect_params(calculations_and_dirs, prm_file_name="parameters.prm", max_workers=None):
+    """
+    Parse the prm file for every (calculation, source_directory) pair and return their params
+    as a single DataFrame with one row per calculation. Write it out once for a whole sweep,
+    e.g. with to_parquet, rather than appending a spreadsheet row per calculation.
+
+    Files are parsed in this process by default; a prm file parses in well under a millisecond,
+    far less than it costs to start worker processes. For very large sweeps pass max_workers
+    to parse in a process pool of that many processes.
+    """
+    import pandas
+
+    pairs = list(calculations_and_dirs)
+    calculations = [calculation for calculation, _ in pairs]
+    source_directories = [source_directory for _, source_directory in pairs]
+    prm_file_names = [prm_file_name] * len(pairs)
+
+    if max_workers is None or max_workers <= 1 or len(pairs) <= 1:
+        rows = list(map(_calculation_params, calculations, source_directories, prm_file_names))
+    else:
+        # Hand each worker several calculations at a time to amortise the pickling round trips
+        chunksize = max(1, len(pairs) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_calculation_params, calculations, source_directories, prm_file_names,
+                                     chunksize=chunksize))
+
+    return pandas.DataFrame(rows)
+
+
+def _excel_columns(excel_file_path, sheet_name):
+    """
+    Return the header row of sheet_name in excel_file_path, or None if the sheet doesn't exist.
+    Only the first row is read, and the result is reused until the file is modified.
+    """
+    from openpyxl import load_workbook
+
+    key = (os.path.abspath(excel_file_path), sheet_name)
+    mtime = os.stat(excel_file_path).st_mtime_ns
+    cached = _excel_columns_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    workbook = load_workbook(excel_file_path, read_only=True, data_only=True)
+    try:
+        if sheet_name in workbook.sheetnames:
+            header = next(workbook[sheet_name].iter_rows(max_row=1, values_only=True), ())
+            columns = [column for column in header if column is not None]
+        else:
+            columns = None
+    finally:
+        workbook.close()
+
+    _excel_columns_cache[key] = (mtime, columns)
+    return columns
+
+
+def _remember_excel_columns(excel_file_path, sheet_name, columns):
+    """Record the header just written to sheet_name so the next append doesn't re-read it."""
+    key = (os.path.abspath(excel_file_path), sheet_name)
+    _excel_columns_cache[key] = (os.stat(excel_file_path).st_mtime_ns, columns)
+
+
+def _write_fast(columns, rows, excel_file_path, sheet_name):
+    """
+    Write rows to a new excel file through a write-only openpyxl workbook, which streams
+    rows out instead of going through pandas' per-cell excel formatting.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(list(columns))
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(excel_file_path)
+
+
+def _to_number(value, dtype):
+    """
+    Return value as a number of the given dtype, or None if it doesn't parse as one exactly:
+    non-finite floats and integers an excel cell can't hold exactly are rejected rather than
+    written as an infinite or rounded numeric cell.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        # float() and int() accept digit separators, which a prm value shouldn't contain
+        if "_" in value:
+            return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number):
+        return None
+    if dtype != "int64":
+        return number
+
+    try:
+        # Parse integer strings directly so values beyond float precision stay exact
+        integer = int(value)
+    except (TypeError, ValueError):
+        if not number.is_integer():
+            return None
+        integer = int(number)
+    # Excel stores numbers as doubles, so only integers within +/-2**53 (well inside int64)
+    # keep every digit
+    if abs(integer) > 2 ** 53:
+        return None
+    return integer
+
+
+def _apply_dtypes(columns, rows, dtypes):
+    """
+    Convert the values in the columns named by dtypes to numbers. Each value is converted on
+    its own, so one value that doesn't parse as its annotated type is kept as written without
+    turning the rest of its column back into text.
+    """
+    positions = {columns.index(column): dtype for column, dtype in dtypes.items() if column in columns}
+    converted_rows = []
+    for row in rows:
+        row = list(row)
+        for position, dtype in positions.items():
+            number = _to_number(row[position], dtype)
+            if number is not None:
+                row[position] = number
+        converted_rows.append(row)
+    return converted_rows
+
+
+def _add_rows_to_excel(columns, rows, calculation, excel_file_path, dtypes=None):
+    from openpyxl import load_workbook
+
+    if dtypes:
+        rows = _apply_dtypes(columns, rows, dtypes)
 
-def add_to_excel(params, calculation, excel_file_path):
-    data_frame = pandas.DataFrame([params])
     if not os.path.exists(excel_file_path):
-        data_frame.to_excel(excel_file_path, index=False)
+        _write_fast(columns, rows, excel_file_path, calculation)
+        _remember_excel_columns(excel_file_path, calculation, list(columns))
         return
 
-    existing_data_frame = pandas.read_excel(excel_file_path)
-    if not set(existing_data_frame.columns).issubset(set(data_frame.columns)):
+    existing_columns = _excel_columns(excel_file_path, calculation)
+    new_sheet = existing_columns is None
+    if new_sheet:
+        existing_columns = list(columns)
+    if not set(existing_columns).issubset(set(columns)):
         raise Exception("Existing excel file does not have the same columns as the new data")
 
-    with pandas.ExcelWriter(excel_file_path, mode='a', engine='openpyxl', if_sheet_exists="overlay") as writer:
-        existing_data_frame.to_excel(writer, sheet_name=calculation, index=False, header=False,
-                                     startrow=writer.sheets[calculation].max_row)
+    workbook = load_workbook(excel_file_path)
+    if new_sheet:
+        worksheet = workbook.create_sheet(calculation)
+        worksheet.append(existing_columns)
+    else:
+        worksheet = workbook[calculation]
+
+    # Line the new rows up with the sheet's header rather than relying on column order
+    positions = [columns.index(column) for column in existing_columns]
+    for row in rows:
+        worksheet.append([row[position] for position in positions])
+    workbook.save(excel_file_path)
+    _remember_excel_columns(excel_file_path, calculation, existing_columns)
+
+
+def add_to_excel(params, calculation, excel_file_path):
+    _add_rows_to_excel(list(params), [list(params.values())], calculation, excel_file_path)
+
+
+class ExcelAppender:
+    """
+    Buffer params rows for a calculation and write them to an excel file together, so a
+    run of appends pays for opening and saving the workbook once instead of once per row.
+
+    Usage:
+        with ExcelAppender(excel_file_path, calculation, dtypes=parser.to_dtypes()) as appender:
+            for params in all_params:
+                appender.append(params)
+    """
+
+    def __init__(self, excel_file_path, calculation, chunk_size=None, dtypes=None):
+        """
+        Args:
+            excel_file_path (str): Excel file to write to, created if it doesn't exist
+            calculation (str): Name of the sheet the rows are added to
+            chunk_size (int, optional): Flush after this many buffered rows. By default
+                rows are only written when the appender is closed.
+            dtypes (dict, optional): Column to pandas dtype mapping applied when rows are
+                written, as returned by ParameterFileParser.to_dtypes
+        """
+        self.excel_file_path = excel_file_path
+        self.calculation = calculation
+        self.chunk_size = chunk_size
+        self.dtypes = dtypes
+        self._columns = None
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Only write the remaining rows if the with block finished; a failed sweep leaves the
+        # workbook as it was after the last chunk_size flush
+        if exc_type is None:
+            self.flush()
+
+    def append(self, params):
+        # The first row fixes the columns; later rows are stored as plain lists in that order
+        if self._columns is None:
+            self._columns = list(params)
+        try:
+            self._rows.append([params[column] for column in self._columns])
+        except KeyError:
+            raise Exception("Params do not have the same columns as the rows already appended")
+        if self.chunk_size and len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write any buffered rows to the excel file."""
+        if not self._rows:
+            return
+        _add_rows_to_excel(self._columns, self._rows, self.calculation, self.excel_file_path, self.dtypes)
+        self._rows = []
+
+
+def add_to_store(params, calculation, store_path):
+    """
+    Append params as a new row to the parquet store at store_path. Each call writes its own
+    part file under the calculation's partition, so appending doesn't touch existing rows.
+    Part files are named by write time so they sort in the order the rows were added.
+    """
+    import pandas
+
+    partition_dir = Path(store_path) / f"calculation={calculation}"
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    part_name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+    pandas.DataFrame([params]).to_parquet(partition_dir / part_name, index=False)
+
+
+def export_store_to_excel(calculation, store_path, excel_file_path):
+    """
+    Write all rows stored for calculation in the parquet store at store_path to an excel file.
+    The store keeps one part file per add_to_store call, so exporting opens one parquet file
+    per stored row.
+    """
+    import pandas
 
+    # Each part file carries the schema inferred from its own row, so read them one at a time
+    # and let concat take the union of their columns rather than reading the partition as a
+    # dataset, which uses the schema of whichever part it happens to open first
+    partition_dir = Path(store_path) / f"calculation={calculation}"
+    part_files = sorted(partition_dir.glob("part-*.parquet"))
+    if not part_files:
+        raise Exception(f"No rows stored for calculation '{calculation}' in store '{store_path}'")
+    data_frame = pandas.concat([pandas.read_parquet(part_file) for part_file in part_files],
+                               ignore_index=True)
+    data_frame.to_excel(excel_file_path, sheet_name=calculation, index=False)
@@ -1,7 +1,10 @@
-import glob
 import os
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# File copies are I/O bound and release the GIL, so threads are enough to overlap them
+_MAX_COPY_WORKERS = min(16, (os.cpu_count() or 1) * 2)
 
 
 class ImportSimulator:
@@ -79,61 +82,110 @@ class ImportSimulator:
         self.movie_dir = os.path.join(self.data_dir, "movies")
         self.postprocess_dir = os.path.join(self.data_dir, "postprocess")
 
-        # Create all subdirectories
-        for directory in [self.code_dir, self.data_dir, self.output_dir, 
-                         self.image_dir, self.movie_dir, self.postprocess_dir]:
-            os.makedirs(directory, exist_ok=True)
+        # Create all subdirectories. Their parents are known to exist, so a single mkdir
+        # each is enough instead of makedirs walking the whole path again
+        for directory in [self.code_dir, self.data_dir, self.output_dir,
+                          self.image_dir, self.movie_dir, self.postprocess_dir]:
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                # Like makedirs(exist_ok=True), only an existing directory is acceptable
+                if not os.path.isdir(directory):
+                    raise
 
     def _organize_files(self):
         """Organize files from the source directory into the destination directory structure."""
+        # Scan the source directory once and match every pattern against that listing
+        with os.scandir(self.src_dir) as it:
+            entries = list(it)
+
         # Copy code files
         code_extensions = ["*.cc", "*.c", "*.cpp", "*.cxx", "*.h", "*.hpp", 
                           "*.prm", "*.py", "*.sh", "*.json", "*.yaml", "*.yml"]
-        self._copy_files_by_pattern(code_extensions, self.code_dir, copy=True)
+        self._copy_files_by_pattern(entries, code_extensions, self.code_dir, copy=True)
 
         # Copy or move output files
         output_extensions = ["*.vtk", "*.vtu", "*.pvtu"]
-        self._copy_files_by_pattern(output_extensions, self.output_dir, copy=self.copy_output)
+        self._copy_files_by_pattern(entries, output_extensions, self.output_dir, copy=self.copy_output,
+                                    preserve_metadata=False)
 
         # Copy markdown files to the root destination directory
-        self._copy_files_by_pattern(["*.md"], self.dst_dir, copy=True)
+        self._copy_files_by_pattern(entries, ["*.md"], self.dst_dir, copy=True)
 
         # Handle special case files
-        self._handle_special_files()
+        self._handle_special_files(entries)
 
-    def _copy_files_by_pattern(self, patterns, destination, copy=True):
+    def _copy_files_by_pattern(self, entries, patterns, destination, copy=True, preserve_metadata=True):
         """
         Copy or move files matching the given patterns to the destination directory.
 
         Args:
-            patterns (list): List of glob patterns to match files
+            entries (list): os.DirEntry objects from scanning the source directory
+            patterns (list): List of `*.<ext>` glob patterns to match files
             destination (str): Destination directory
             copy (bool): Whether to copy (True) or move (False) the files
+            preserve_metadata (bool): Whether copies keep the source's permissions and timestamps.
+                Skipping this for large output files leaves just the kernel-side data copy.
+        """
+        # Every pattern is a `*.<ext>` wildcard, so matching reduces to a set lookup on the suffix
+        suffixes = frozenset(pattern.lstrip("*") for pattern in patterns)
+
+        transfers = []
+        for entry in entries:
+            # Like glob, wildcards don't match hidden files
+            if entry.name.startswith("."):
+                continue
+            # Test the name first so is_file() only runs for candidates. It is answered from the
+            # dirent type without a stat, except for symlinks, which are followed like glob did
+            if os.path.splitext(entry.name)[1] in suffixes and entry.is_file():
+                if copy and preserve_metadata:
+                    transfers.append((shutil.copy2, entry.path, destination))
+                elif copy:
+                    transfers.append((shutil.copyfile, entry.path, os.path.join(destination, entry.name)))
+                else:
+                    # shutil.move is a single rename when both paths are on the same filesystem
+                    transfers.append((shutil.move, entry.path, destination))
+
+        self._transfer_files(transfers)
+        return bool(transfers)
+
+    def _transfer_files(self, transfers):
+        """
+        Run file transfers concurrently.
+
+        Args:
+            transfers (list): (function, source, destination) tuples, e.g. (shutil.copy2, src, dst)
         """
-        found_files = False
-        for pattern in patterns:
-            matching_files = glob.glob(os.path.join(self.src_dir, pattern))
-            if matching_files:
-                found_files = True
-                for file_path in matching_files:
-                    if copy:
-                        shutil.copy2(file_path, destination)
-                    else:
-                        shutil.move(file_path, destination)
-
-        return found_files
-
-    def _handle_special_files(self):
-        """Handle special case files like CMakeLists.txt and integratedFields.txt."""
+        if len(transfers) <= 1:
+            for transfer, source, destination in transfers:
+                transfer(source, destination)
+            return
+
+        with ThreadPoolExecutor(max_workers=_MAX_COPY_WORKERS) as executor:
+            futures = [executor.submit(transfer, source, destination)
+                       for transfer, source, destination in transfers]
+            # Re-raise the first failure, if any
+            for future in futures:
+                future.result()
+
+    def _handle_special_files(self, entries):
+        """
+        Handle special case files like CMakeLists.txt and integratedFields.txt.
+
+        Args:
+            entries (list): os.DirEntry objects from scanning the source directory
+        """
+        by_name = {entry.name: entry for entry in entries}
+
         # Check for CMakeLists.txt
-        cmake_file = os.path.join(self.src_dir, "CMakeLists.txt")
-        if os.path.isfile(cmake_file):
-            shutil.copy2(cmake_file, self.code_dir)
+        cmake_file = by_name.get("CMakeLists.txt")
+        if cmake_file is not None and cmake_file.is_file():
+            shutil.copy2(cmake_file.path, self.code_dir)
 
         # Check for integratedFields.txt
-        integrated_fields_file = os.path.join(self.src_dir, "integratedFields.txt")
-        if os.path.isfile(integrated_fields_file):
-            shutil.copy2(integrated_fields_file, self.postprocess_dir)
+        integrated_fields_file = by_name.get("integratedFields.txt")
+        if integrated_fields_file is not None and integrated_fields_file.is_file():
+            shutil.copy2(integrated_fields_file.path, self.postprocess_dir)
 
     def _create_result(self, success, message):
         """